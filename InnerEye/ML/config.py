@@ -97,7 +97,8 @@ class SegmentationLoss(Enum):
     The types of training loss that are supported for segmentation models.
     Parameters that can be set in the segmentation configs related to loss functions:
 
-    |  SoftDice: :attr:`SegmentationModelBase.loss_class_weight_power`
+    |  SoftDice: :attr:`SegmentationModelBase.loss_class_weight_power`,
+        :attr:`SegmentationModelBase.loss_class_weight_update_interval`
     |  CrossEntropy: :attr:`SegmentationModelBase.loss_class_weight_power`,
         :attr:`DeepLearningConfig.label_smoothing_eps`
     |  Focal: :attr:`SegmentationModelBase.loss_class_weight_power`,
@@ -230,6 +231,21 @@ class SegmentationModelBase(ModelConfigBase):
     architecture: str = param.String("Basic", doc="The model architecture (for example, UNet). Valid options are"
                                                   "UNet3D, UNet2D, Basic (DeepMedic)")
 
+    #: If True, store the model weights and the input image crops in channels-last memory format.
+    use_channels_last: bool = param.Boolean(False, doc="If True, the model weights and the input image crops are stored "
+                                                       "in channels-last (NDHWC) memory format during training. This "
+                                                       "can speed up convolutions on GPUs with Tensor Cores, in "
+                                                       "particular when combined with use_mixed_precision.")
+
+    #: If True, the training and validation crops carry their labels as uint8 rather than float32.
+    transfer_labels_as_uint8: bool = param.Boolean(False, doc="If True, the data loader workers return the one-hot "
+                                                              "labels of the training and validation crops as uint8 "
+                                                              "rather than float32. This reduces the amount of label "
+                                                              "data sent from the workers to the training process by "
+                                                              "a factor of 4. The labels are converted back to float "
+                                                              "on the training device. Only use this if all cropped "
+                                                              "sample transforms keep the labels binary.")
+
     #: The loss type to use during training.
     #: Valid options are defined at :class:`SegmentationLoss`: "SoftDice", "CrossEntropy", "Focal", "Mixture"
     loss_type: SegmentationLoss = param.ClassSelector(default=SegmentationLoss.SoftDice, class_=SegmentationLoss,
@@ -246,6 +262,14 @@ class SegmentationModelBase(ModelConfigBase):
                                                             doc="Power to which to raise class weights for loss "
                                                                 "function; default value will depend on loss_type")
 
+    #: For weighted SoftDice loss, the number of training minibatches after which the class weights are recomputed.
+    loss_class_weight_update_interval: int = param.Integer(1, bounds=(1, None),
+                                                           doc="For weighted SoftDice loss: If 1, the class weights "
+                                                               "are computed from each training minibatch. If larger "
+                                                               "than 1, they are only computed every this many "
+                                                               "minibatches, and a moving average of them is used "
+                                                               "in between.")
+
     #: Gamma value for focal loss: weight for each pixel is posterior likelihood to the power -focal_loss_gamma.
     focal_loss_gamma: float = param.Number(1.0, doc="Gamma value for focal loss: weight for each pixel is "
                                                     "posterior likelihood to the power -focal_loss_gamma.")
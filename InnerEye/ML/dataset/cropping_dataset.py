@@ -48,7 +48,15 @@ class CroppingDataset(FullImageDataset):
             class_weights=self.args.class_weights
         )
 
-        return Compose3D.apply(self.cropped_sample_transforms, sample).get_dict()
+        sample = Compose3D.apply(self.cropped_sample_transforms, sample)
+        if self.args.transfer_labels_as_uint8:
+            # Labels are one-hot, hence can be stored without loss as uint8. They are converted back to float
+            # on the training device.
+            sample = sample.clone_with_overrides(
+                labels=np.asarray(sample.labels, dtype=ImageDataType.MASK.value),
+                labels_center_crop=np.asarray(sample.labels_center_crop, dtype=ImageDataType.MASK.value)
+            )
+        return sample.get_dict()
 
     @staticmethod
     def create_possibly_padded_sample_for_cropping(sample: Sample,
@@ -3,6 +3,7 @@
 #  Licensed under the MIT License (MIT). See LICENSE in the repo root for license information.
 #  ------------------------------------------------------------------------------------------
 import logging
+import math
 import os
 from abc import ABC
 from collections import Counter
@@ -50,6 +51,25 @@ def collate_with_metadata(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
     raise TypeError(f"Unexpected batch data: Expected a dictionary, but got: {type(elem)}")
 
 
+def pin_worker_to_cores(worker_id: int) -> None:
+    """
+    A worker_init_fn for data loaders that restricts each worker process to a disjoint, contiguous block of the CPU
+    cores that the process is allowed to run on. Contiguous blocks of cores usually belong to the same CPU socket,
+    hence each worker allocates its memory close to the cores it runs on. This has no effect on operating systems
+    that do not support setting the CPU affinity.
+
+    :param worker_id: The index of the data loader worker process.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    worker_info = torch.utils.data.get_worker_info()
+    num_workers = worker_info.num_workers if worker_info is not None else 1
+    cores = sorted(os.sched_getaffinity(0))
+    cores_per_worker = max(1, len(cores) // num_workers)
+    start = (worker_id * cores_per_worker) % len(cores)
+    os.sched_setaffinity(0, cores[start:start + cores_per_worker])
+
+
 class _RepeatSampler(BatchSampler):
     """
     A batch sampler that wraps another batch sampler. It repeats the contents of that other sampler forever.
@@ -170,6 +190,7 @@ class GeneralDataset(Dataset, ABC, Generic[D]):
                        max_repeats: Optional[int] = None) -> DataLoader:
         num_dataload_workers = num_dataload_workers or self.args.num_dataload_workers
         batch_size = batch_size or self.args.train_batch_size
+        worker_init_fn = pin_worker_to_cores if self.args.pin_dataload_workers_to_cores else None
         if self.args.avoid_process_spawn_in_data_loaders:
             if max_repeats is None:
                 max_repeats = self.args.get_total_number_of_training_epochs()
@@ -180,6 +201,7 @@ class GeneralDataset(Dataset, ABC, Generic[D]):
                 shuffle=shuffle,
                 num_workers=num_dataload_workers,
                 pin_memory=self.args.pin_memory,
+                worker_init_fn=worker_init_fn,
                 collate_fn=collate_with_metadata,
                 use_imbalanced_sampler=use_imbalanced_sampler,
                 drop_last=drop_last_batch
@@ -190,12 +212,18 @@ class GeneralDataset(Dataset, ABC, Generic[D]):
                 shuffle = False
             else:
                 sampler = None
+            # Workers are started anew in each epoch, and there is nothing to do for workers beyond the number
+            # of minibatches per epoch. This matters in particular for small validation sets.
+            num_batches = len(self) // batch_size if drop_last_batch else math.ceil(len(self) / batch_size)
+            num_dataload_workers = min(num_dataload_workers, num_batches)
             return DataLoader(
                 self,
                 batch_size=batch_size,
                 shuffle=shuffle,
                 num_workers=num_dataload_workers,
                 pin_memory=self.args.pin_memory,
+                persistent_workers=self.args.persistent_dataload_workers and num_dataload_workers > 0,
+                worker_init_fn=worker_init_fn,
                 collate_fn=collate_with_metadata,
                 sampler=sampler,  # type: ignore
                 drop_last=drop_last_batch
@@ -602,6 +602,12 @@ class TrainerParams(param.Parameterized):
                                                     "training.")
     use_mixed_precision: bool = param.Boolean(False, doc="If true, mixed precision training is activated during "
                                                          "training.")
+    async_checkpointing: bool = param.Boolean(False, doc="If true, checkpoint files are written in a background "
+                                                         "thread, such that training does not have to wait for the "
+                                                         "file to be written.")
+    use_bfloat16: bool = param.Boolean(False, doc="If true, and use_mixed_precision is also true, mixed precision "
+                                                  "training uses bfloat16 rather than float16. This requires a GPU "
+                                                  "that supports bfloat16, like the A100.")
     max_num_gpus: int = param.Integer(default=-1, doc="The maximum number of GPUS to use. If set to a value < 0, use"
                                                       "all available GPUs. In distributed training, this is the "
                                                       "maximum number of GPUs per node.")
@@ -697,6 +703,15 @@ class DeepLearningConfig(WorkflowParams,
                                                         "available GPUs to fit in a large model. It shall not be used "
                                                         "together with data parallel.")
     pin_memory: bool = param.Boolean(True, doc="Value of pin_memory argument to DataLoader")
+    persistent_dataload_workers: bool = \
+        param.Boolean(False, doc="Value of persistent_workers argument to DataLoader. If True, the data loading worker "
+                                 "processes are kept alive across epochs, rather than being re-created at the start of "
+                                 "each epoch. This has no effect if num_dataload_workers is 0, or if "
+                                 "avoid_process_spawn_in_data_loaders is True.")
+    pin_dataload_workers_to_cores: bool = \
+        param.Boolean(False, doc="If True, each data loading worker process is restricted to its own subset of the CPU "
+                                 "cores that are available to the training process. This avoids workers migrating "
+                                 "between cores and sockets on multi-socket machines. Only has an effect on Linux.")
     restrict_subjects: Optional[str] = \
         param.String(doc="Use at most this number of subjects for train, val, or test set (must be > 0 or None). "
                          "If None, do not modify the train, val, or test sets. If a string of the form 'i,j,k' where "
@@ -2,7 +2,6 @@
 #  Copyright (c) Microsoft Corporation. All rights reserved.
 #  Licensed under the MIT License (MIT). See LICENSE in the repo root for license information.
 #  ------------------------------------------------------------------------------------------
-import math
 from typing import Any, Iterator, List, Tuple
 
 import numpy as np
@@ -24,10 +23,10 @@ def nanmean(values: torch.Tensor) -> torch.Tensor:
     :param values: The values to average.
     :return: A scalar tensor containing the average.
     """
-    valid = values[~torch.isnan(values.view((-1,)))]
-    if valid.numel() == 0:
-        return torch.tensor([math.nan]).type_as(values)
-    return valid.mean()
+    # This is written without boolean indexing or conditionals on tensor values, such that it does not need to
+    # synchronize with the GPU. If all values are NaN, the result is 0 / 0, which is NaN.
+    values = values.view((-1,))
+    return torch.nansum(values) / (~torch.isnan(values)).sum()
 
 
 class MeanAbsoluteError(metrics.MeanAbsoluteError):
@@ -101,10 +100,11 @@ class AverageWithoutNan(Metric):
         """
         Stores all the given individual elements of the given tensor in the present object.
         """
-        for v in value.view((-1,)):
-            if not torch.isnan(v):
-                self.sum = self.sum + v  # type: ignore
-                self.count = self.count + 1  # type: ignore
+        # Skip NaN values without looking at them on the host, which would require a GPU synchronization for
+        # each element.
+        values = value.view((-1,))
+        self.sum = self.sum + torch.nansum(values)  # type: ignore
+        self.count = self.count + (~torch.isnan(values)).sum()  # type: ignore
 
     def compute(self) -> torch.Tensor:
         if self.count == 0.0:
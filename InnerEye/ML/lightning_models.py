@@ -36,6 +36,8 @@ class SegmentationLightning(InnerEyeLightning):
         super().__init__(config, *args, **kwargs)
         self.config = config
         self.model = config.create_model()
+        if config.use_channels_last:
+            self.model = self.model.to(memory_format=torch.channels_last_3d)
         self.loss_fn = model_util.create_segmentation_loss_function(config)
         self.ground_truth_ids = config.ground_truth_ids
         self.train_dice = MetricForMultipleStructures(ground_truth_ids=self.ground_truth_ids, is_training=True)
@@ -76,16 +78,24 @@ class SegmentationLightning(InnerEyeLightning):
         :param batch_index: The index of the present batch (supplied only for diagnostics).
         """
         cropped_sample: CroppedSample = CroppedSample.from_dict(sample=sample)
+        if self.config.transfer_labels_as_uint8:
+            cropped_sample = cropped_sample.clone_with_overrides(
+                labels=cropped_sample.labels.float(),  # type: ignore
+                labels_center_crop=cropped_sample.labels_center_crop.float()  # type: ignore
+            )
         # Forward propagation can lead to a model output that is smaller than the input image (crop).
         # labels_center_crop is the relevant part of the labels tensor that the model will actually produce.
         labels = cropped_sample.labels_center_crop
 
         mask = cropped_sample.mask_center_crop if is_training else None
+        image = cropped_sample.image
+        if self.config.use_channels_last:
+            image = image.contiguous(memory_format=torch.channels_last_3d)
         if is_training:
-            logits = self.model(cropped_sample.image)
+            logits = self.model(image)
         else:
             with torch.no_grad():
-                logits = self.model(cropped_sample.image)
+                logits = self.model(image)
         loss = self.loss_fn(logits, labels)
 
         # apply Softmax on dimension 1 (Class) to map model output into a posterior probability distribution [0,1]
@@ -6,7 +6,7 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import Any, List, Optional, Tuple, TypeVar
+from typing import Any, List, Optional, Tuple, TypeVar, Union
 
 from pytorch_lightning import Callback, Trainer, seed_everything
 from pytorch_lightning.callbacks import GPUStatsMonitor, ModelCheckpoint, TQDMProgressBar
@@ -25,7 +25,7 @@ from InnerEye.ML.lightning_container import LightningContainer
 from InnerEye.ML.lightning_loggers import StoringLogger
 from InnerEye.ML.lightning_models import SUBJECT_OUTPUT_PER_RANK_PREFIX, ScalarLightning, \
     get_subject_output_file_per_rank
-from InnerEye.ML.utils.checkpoint_handling import cleanup_checkpoints
+from InnerEye.ML.utils.checkpoint_handling import AsyncCheckpointIO, cleanup_checkpoints
 from health_azure.utils import is_global_rank_zero, is_local_rank_zero
 from health_ml.utils import AzureMLLogger, AzureMLProgressBar
 
@@ -89,15 +89,20 @@ def create_lightning_trainer(container: LightningContainer,
             # GPU memory).
             # Initialize the DDP plugin. The default for pl_find_unused_parameters is False. If True, the plugin
             # prints out lengthy warnings about the performance impact of find_unused_parameters.
-            strategy = DDPPlugin(find_unused_parameters=container.pl_find_unused_parameters)
+            # With gradient_as_bucket_view, gradients are views into the allreduce buckets, which avoids a copy of
+            # all gradients into and out of the buckets in each step.
+            strategy = DDPPlugin(find_unused_parameters=container.pl_find_unused_parameters,
+                                 gradient_as_bucket_view=True)
             message += "s per node with DDP"
     logging.info(f"Using {message}")
     tensorboard_logger = TensorBoardLogger(save_dir=str(container.logs_folder), name="Lightning", version="")
     loggers = [tensorboard_logger, AzureMLLogger(False)]
     storing_logger = StoringLogger()
     loggers.append(storing_logger)
-    # Use 32bit precision when running on CPU. Otherwise, make it depend on use_mixed_precision flag.
-    precision = 32 if num_gpus == 0 else 16 if container.use_mixed_precision else 32
+    # Use 32bit precision when running on CPU. Otherwise, make it depend on use_mixed_precision and use_bfloat16 flags.
+    precision: Union[int, str] = 32
+    if num_gpus > 0 and container.use_mixed_precision:
+        precision = "bf16" if container.use_bfloat16 else 16
     # The next two flags control the settings in torch.backends.cudnn.deterministic and torch.backends.cudnn.benchmark
     # https://pytorch.org/docs/stable/notes/randomness.html
     # Note that switching to deterministic models can have large performance downside.
@@ -143,6 +148,15 @@ def create_lightning_trainer(container: LightningContainer,
         else:
             callbacks.append(more_callbacks)  # type: ignore
     callbacks.extend(container.get_callbacks())
+    plugins: List[Any] = []
+    if container.async_checkpointing:
+        plugins.append(AsyncCheckpointIO())
+    if "plugins" in additional_args:
+        more_plugins = additional_args.pop("plugins")
+        if isinstance(more_plugins, list):
+            plugins.extend(more_plugins)
+        else:
+            plugins.append(more_plugins)
     is_azureml_run = not is_offline_run_context(RUN_CONTEXT)
     progress_bar_refresh_rate = container.pl_progress_bar_refresh_rate
     if progress_bar_refresh_rate is None:
@@ -179,6 +193,7 @@ def create_lightning_trainer(container: LightningContainer,
                       profiler=container.pl_profiler,
                       resume_from_checkpoint=str(resume_from_checkpoint) if resume_from_checkpoint else None,
                       multiple_trainloader_mode=multiple_trainloader_mode,
+                      plugins=plugins,
                       **additional_args)
     return trainer, storing_logger
 
@@ -267,6 +282,10 @@ def model_train(checkpoint_path: Optional[Path],
 
     trainer.fit(lightning_model, datamodule=data_module)
     trainer.logger.close()  # type: ignore
+    # Checkpoints may still be written in the background. Wait for them before any checkpoint files are used.
+    checkpoint_io = trainer.strategy.checkpoint_io
+    if isinstance(checkpoint_io, AsyncCheckpointIO):
+        checkpoint_io.wait()
 
     world_size = getattr(trainer, "world_size", 0)
     is_azureml_run = not is_offline_run_context(RUN_CONTEXT)
@@ -2,7 +2,7 @@
 #  Copyright (c) Microsoft Corporation. All rights reserved.
 #  Licensed under the MIT License (MIT). See LICENSE in the repo root for license information.
 #  ------------------------------------------------------------------------------------------
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
 
@@ -10,6 +10,52 @@ from InnerEye.ML.utils.image_util import get_class_weights
 from InnerEye.ML.utils.supervised_criterion import SupervisedLearningCriterion
 
 
+@torch.jit.script
+def _dice_stats(output: torch.Tensor,
+                target: torch.Tensor,
+                sum_dims: List[int],
+                eps: float,
+                apply_softmax: bool) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Computes the per-class sums that make up the soft-dice ratio. This is scripted so that the softmax, the
+    elementwise products and the reductions can be fused into a small number of kernels, rather than materializing
+    each intermediate.
+
+    :param output: The output of the network, of shape Batch x Classes x ...
+    :param target: The target of the network, of the same shape as the output.
+    :param sum_dims: The dimensions to sum over.
+    :param eps: A small constant that is added to each product before summing.
+    :param apply_softmax: If true, apply a Softmax across the class dimension to the output first.
+    :return: A tuple of (intersection, sum of squared outputs, sum of squared targets). These are always float32,
+        also when the inputs are float16 or bfloat16 under mixed precision training: The products are computed in the
+        input precision, but summed up in float32, where the sums can neither overflow nor lose small classes.
+    """
+    if apply_softmax:
+        # Compute the softmax in at least float32, like autocast does for softmax outside of scripted code.
+        if output.dtype == torch.float16 or output.dtype == torch.bfloat16:
+            output = output.float()
+        output = torch.softmax(output, dim=1)
+    # Adding eps to each product before summing is the same as adding eps times the number of summed elements
+    # afterwards. Doing the latter avoids allocating a second full-sized temporary for each product.
+    num_summed = 1
+    for dim in sum_dims:
+        num_summed *= output.shape[dim]
+    eps_sum = eps * num_summed
+    return torch.sum(output * target, dim=sum_dims, dtype=torch.float32) + eps_sum, \
+        torch.sum(output * output, dim=sum_dims, dtype=torch.float32) + eps_sum, \
+        torch.sum(target * target, dim=sum_dims, dtype=torch.float32) + eps_sum
+
+
+@torch.jit.script
+def _dice_loss_from_stats(intersection: torch.Tensor,
+                          output_sum_square: torch.Tensor,
+                          target_sum_square: torch.Tensor) -> torch.Tensor:
+    """
+    Computes the soft-dice loss from the per-class sums returned by _dice_stats, averaged over batch and classes.
+    """
+    return 1.0 - 2.0 * torch.mean(intersection / (output_sum_square + target_sum_square))
+
+
 class SoftDiceLoss(SupervisedLearningCriterion):
     """
     Implementation of Soft-Dice Loss.
@@ -20,7 +66,9 @@ class SoftDiceLoss(SupervisedLearningCriterion):
     def __init__(self,
                  eps: float = 1e-10,
                  apply_softmax: bool = True,
-                 class_weight_power: Optional[float] = None):
+                 class_weight_power: Optional[float] = None,
+                 class_weight_update_interval: int = 1,
+                 class_weight_momentum: float = 0.99):
         """
         :param eps: A small constant to smooth Sorensen-Dice Loss function. Additionally, it avoids division by zero.
         :param apply_softmax: If true, the input to the loss function will be first fed through a Softmax operation.
@@ -28,12 +76,28 @@ class SoftDiceLoss(SupervisedLearningCriterion):
 
         :param class_weight_power: power to raise 1/C to, where C is the number of voxels in each class. Should be
             non-negative to help increase accuracy on small structures.
+        :param class_weight_update_interval: If 1, the class weights are computed from the target of each minibatch.
+            If larger than 1, the class weights are only computed from the target every class_weight_update_interval
+            training minibatches, and an exponential moving average of them is used in between. In evaluation mode,
+            the class weights are always computed from the target.
+        :param class_weight_momentum: The momentum of the exponential moving average of the class weights, if
+            class_weight_update_interval is larger than 1.
         """
         super().__init__()
+        if class_weight_update_interval < 1:
+            raise ValueError(f"class_weight_update_interval must be at least 1, but got {class_weight_update_interval}")
         #: Small value to avoid division by zero errors.
         self.eps = eps
         self.apply_softmax = apply_softmax
         self.class_weight_power = class_weight_power
+        self.class_weight_update_interval = class_weight_update_interval
+        self.class_weight_momentum = class_weight_momentum
+        # The moving average of the class weights, and the number of training minibatches it has seen. This is
+        # deliberately not a buffer, to keep the class weights out of the model checkpoints.
+        self._class_weights_average: Optional[torch.Tensor] = None
+        self._num_training_minibatches = 0
+        # The spatial dimensions to sum over, for each number of tensor dimensions that have been seen so far.
+        self._sum_dims_by_ndim: Dict[int, List[int]] = {}
 
     def forward_minibatch(self, output: torch.Tensor, target: torch.Tensor, **kwargs: Any) -> torch.Tensor:
         """
@@ -60,29 +124,44 @@ class SoftDiceLoss(SupervisedLearningCriterion):
             raise ValueError("The output and target must have the same shape (output.shape: {}, target.shape: {})".
                              format(output.shape, target.shape))
 
-        if self.apply_softmax:
-            output = torch.nn.functional.softmax(output, dim=1)
         # Get the spatial dimensions; we'll sum numerator and denominator over these for efficiency.
-        axes = list(range(2, len(output.shape)))
+        axes = self._sum_dims_by_ndim.get(output.ndim)
+        if axes is None:
+            axes = list(range(2, output.ndim))
+            self._sum_dims_by_ndim[output.ndim] = axes
 
         # Eps is added to all products, avoiding division errors and problems
         # when a class does not exist in the current patch
-        eps = torch.tensor([self.eps])
-        if output.is_cuda:
-            eps = eps.cuda(device=output.device)
-
-        intersection = torch.sum(output * target + eps, axes)
+        intersection, output_sum_square, target_sum_square = _dice_stats(output, target, axes, self.eps,
+                                                                         self.apply_softmax)
 
         if self.class_weight_power is not None and self.class_weight_power != 0.0:
             # Multiply target by the class weight.
-            class_weights = get_class_weights(target, self.class_weight_power)
-            # noinspection PyTypeChecker
-            intersection = torch.einsum("ij,j->ij", intersection, class_weights)
-
-        output_sum_square = torch.sum(output * output + eps, axes)
-        target_sum_square = torch.sum(target * target + eps, axes)
-        sum_squares = output_sum_square + target_sum_square
+            class_weights = self.get_class_weights(target)
+            # intersection is of size Batch x Classes, class_weights of size Classes: broadcast along the batch.
+            intersection = intersection * class_weights
 
         # Average per Batch and Class
-        # noinspection PyTypeChecker
-        return 1.0 - 2.0 * torch.mean(intersection / sum_squares)  # type: ignore
+        return _dice_loss_from_stats(intersection, output_sum_square, target_sum_square)
+
+    def get_class_weights(self, target: torch.Tensor) -> torch.Tensor:
+        """
+        Gets the class weights to use for the given target. In training mode, if class_weight_update_interval is
+        larger than 1, the class weights are only computed from the target every class_weight_update_interval
+        minibatches, and merged into a moving average that is returned in between.
+
+        :param target: The target of the network, of size Batch x Classes x ...
+        :return: A tensor of size Classes with the weight for each class.
+        """
+        assert self.class_weight_power is not None  # for mypy
+        if not self.training or self.class_weight_update_interval == 1:
+            return get_class_weights(target, self.class_weight_power)
+        average = self._class_weights_average
+        if average is None or average.shape[0] != target.shape[1] or average.device != target.device:
+            average = get_class_weights(target, self.class_weight_power)
+        elif self._num_training_minibatches % self.class_weight_update_interval == 0:
+            class_weights = get_class_weights(target, self.class_weight_power)
+            average = self.class_weight_momentum * average + (1.0 - self.class_weight_momentum) * class_weights
+        self._class_weights_average = average
+        self._num_training_minibatches += 1
+        return average
@@ -8,12 +8,15 @@ import tempfile
 import time
 import uuid
 from builtins import property
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlparse
 
 import requests
 import torch
+from pytorch_lightning.plugins import TorchCheckpointIO
+from pytorch_lightning.utilities.apply_func import apply_to_collection
 
 from azureml.core import Model, Run, Workspace
 
@@ -235,6 +238,53 @@ class CheckpointHandler:
         return checkpoint_paths
 
 
+class AsyncCheckpointIO(TorchCheckpointIO):
+    """
+    A PyTorch Lightning checkpoint plugin that writes checkpoint files in a background thread, such that training
+    can continue while the file is being written. All tensors in the checkpoint are copied to the CPU before
+    save_checkpoint returns, hence the file reflects the model state at the time of saving, even if training
+    modifies the weights in the meantime.
+    Save and remove operations are executed in the order in which they were requested. Call `wait` to block until
+    all pending operations have finished.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: List[Future] = []
+
+    def save_checkpoint(self, checkpoint: Dict[str, Any], path: Any, storage_options: Optional[Any] = None) -> None:
+        checkpoint = apply_to_collection(checkpoint, torch.Tensor, lambda t: t.detach().to("cpu", copy=True))
+        self._submit(super().save_checkpoint, checkpoint, path, storage_options)
+
+    def remove_checkpoint(self, path: Any) -> None:
+        self._submit(super().remove_checkpoint, path)
+
+    def _submit(self, fn: Callable, *args: Any) -> None:
+        """
+        Schedules the given function to run in the background thread. Before doing that, any errors from
+        previously finished operations are raised.
+        """
+        self._raise_errors_of_finished_operations()
+        self._pending.append(self._executor.submit(fn, *args))
+
+    def _raise_errors_of_finished_operations(self) -> None:
+        finished = [future for future in self._pending if future.done()]
+        self._pending = [future for future in self._pending if not future.done()]
+        for future in finished:
+            future.result()
+
+    def wait(self) -> None:
+        """
+        Blocks until all pending save and remove operations have finished. If any of them failed, the exception
+        is raised here.
+        """
+        pending = self._pending
+        self._pending = []
+        for future in pending:
+            future.result()
+
+
 def download_folder_from_run_to_temp_folder(folder: str,
                                             run: Optional[Run] = None,
                                             workspace: Optional[Workspace] = None) -> Path:
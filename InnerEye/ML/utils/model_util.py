@@ -84,7 +84,8 @@ def create_segmentation_loss_component(model_config: SegmentationModelBase,
     :return: instance of loss function
     """
     if loss_type == SegmentationLoss.SoftDice:
-        return SoftDiceLoss(class_weight_power=power)
+        return SoftDiceLoss(class_weight_power=power,
+                            class_weight_update_interval=model_config.loss_class_weight_update_interval)
     elif loss_type == SegmentationLoss.CrossEntropy:
         return CrossEntropyLoss(class_weight_power=power,
                                 smoothing_eps=model_config.label_smoothing_eps,
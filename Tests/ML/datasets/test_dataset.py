@@ -13,7 +13,7 @@ from pytorch_lightning.utilities.data import extract_batch_size
 from InnerEye.Common import common_util
 from InnerEye.ML.config import PaddingMode, SegmentationModelBase
 from InnerEye.ML.dataset.cropping_dataset import CroppingDataset
-from InnerEye.ML.dataset.full_image_dataset import FullImageDataset, collate_with_metadata
+from InnerEye.ML.dataset.full_image_dataset import FullImageDataset, collate_with_metadata, pin_worker_to_cores
 from InnerEye.ML.dataset.sample import CroppedSample, PatientMetadata, SAMPLE_METADATA_FIELD, Sample
 from InnerEye.ML.model_config_base import ModelConfigBase
 from InnerEye.ML.photometric_normalization import PhotometricNormalization
@@ -212,6 +212,30 @@ def test_cropping_dataset_as_data_loader(cropping_dataset: CroppingDataset, num_
                 assert np.array_equal(item.labels_center_crop[b][c], expected)
 
 
+def test_data_loader_workers_limited_by_batches(cropping_dataset: CroppingDataset) -> None:
+    """
+    Test that a data loader does not start more worker processes than there are minibatches in an epoch.
+    """
+    cropping_dataset.args.avoid_process_spawn_in_data_loaders = False
+    loader = cropping_dataset.as_data_loader(shuffle=False, batch_size=len(cropping_dataset),
+                                             num_dataload_workers=4)
+    assert len(loader) == 1
+    assert loader.num_workers == 1
+
+
+def test_cropping_dataset_persistent_workers(cropping_dataset: CroppingDataset, num_dataload_workers: int) -> None:
+    """
+    Test that the persistent_dataload_workers flag is passed through to the data loader, and that such a loader
+    can be iterated over for more than one epoch.
+    """
+    cropping_dataset.args.persistent_dataload_workers = True
+    loader = cropping_dataset.as_data_loader(shuffle=True, batch_size=2,
+                                             num_dataload_workers=num_dataload_workers)
+    assert loader.persistent_workers == (num_dataload_workers > 0)
+    for epoch in range(2):
+        assert len(list(loader)) == len(loader)
+
+
 def test_cropping_dataset_sample_dtype(cropping_dataset: CroppingDataset, num_dataload_workers: int) -> None:
     """
     Tests the data type of torch tensors (e.g. image, labels, and mask) created by the dataset generator,
@@ -229,6 +253,34 @@ def test_cropping_dataset_sample_dtype(cropping_dataset: CroppingDataset, num_da
         assert item.labels_center_crop.numpy().dtype == ImageDataType.SEGMENTATION.value
 
 
+def test_cropping_dataset_pin_workers_to_cores(cropping_dataset: CroppingDataset,
+                                               num_dataload_workers: int) -> None:
+    """
+    Test that data loading works when the worker processes are pinned to CPU cores.
+    """
+    cropping_dataset.args.pin_dataload_workers_to_cores = True
+    loader = cropping_dataset.as_data_loader(shuffle=True, batch_size=2,
+                                             num_dataload_workers=num_dataload_workers)
+    assert loader.worker_init_fn is pin_worker_to_cores
+    assert len(list(loader)) == len(loader)
+
+
+def test_cropping_dataset_labels_as_uint8(cropping_dataset: CroppingDataset) -> None:
+    """
+    Test that the labels can be returned as uint8, without changing their values.
+    """
+    cropping_dataset.dataset_indices = ['1']
+    ml_util.set_random_seed(1)
+    expected = CroppedSample.from_dict(cropping_dataset[0])
+    cropping_dataset.args.transfer_labels_as_uint8 = True
+    ml_util.set_random_seed(1)
+    actual = CroppedSample.from_dict(cropping_dataset[0])
+    assert actual.labels.dtype == ImageDataType.MASK.value
+    assert actual.labels_center_crop.dtype == ImageDataType.MASK.value
+    assert np.array_equal(actual.labels, expected.labels)
+    assert np.array_equal(actual.labels_center_crop, expected.labels_center_crop)
+
+
 def test_cropping_dataset_padding(cropping_dataset: CroppingDataset, num_dataload_workers: int) -> None:
     """
     Tests the data type of torch tensors (e.g. image, labels, and mask) created by the dataset generator,
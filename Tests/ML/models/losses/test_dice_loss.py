@@ -7,7 +7,8 @@ from typing import Any
 import pytest
 import torch
 
-from InnerEye.ML.models.losses.soft_dice import SoftDiceLoss
+from InnerEye.ML.models.losses.soft_dice import SoftDiceLoss, _dice_stats
+from InnerEye.ML.utils.image_util import get_class_weights
 
 # Set random seed
 torch.random.manual_seed(1)
@@ -77,3 +78,79 @@ def test_half_dice_loss() -> None:
     half_right_target[..., 1, 0:4:2] = 1
 
     assert dice_loss_f(half_right_output, half_right_target).item() == 0.5
+
+
+@pytest.mark.parametrize("output_target", list(zip(valid_random_outputs, valid_random_targets)))
+def test_dice_stats(output_target: Any) -> None:
+    """
+    Test that the scripted helper computes the same per-class sums as the plain PyTorch expressions.
+    """
+    output, target = output_target
+    axes = list(range(2, len(output.shape)))
+    eps = 1e-5
+    intersection, output_sum_square, target_sum_square = _dice_stats(output, target, axes, eps, False)
+    assert torch.allclose(intersection, torch.sum(output * target + eps, axes))
+    assert torch.allclose(output_sum_square, torch.sum(output * output + eps, axes))
+    assert torch.allclose(target_sum_square, torch.sum(target * target + eps, axes))
+
+
+def test_dice_loss_with_class_weights() -> None:
+    """
+    Test that class weights are applied to the intersection term of each class.
+    """
+    output, target = valid_random_outputs[2], valid_random_targets[2]
+    loss_fn = SoftDiceLoss(eps=0, apply_softmax=False, class_weight_power=1.0)
+    axes = list(range(2, len(output.shape)))
+    class_weights = get_class_weights(target, class_weight_power=1.0)
+    intersection = torch.sum(output * target, axes) * class_weights.view(1, -1)
+    sum_squares = torch.sum(output * output, axes) + torch.sum(target * target, axes)
+    expected = 1.0 - 2.0 * torch.mean(intersection / sum_squares)
+    assert torch.allclose(loss_fn(output, target), expected)
+
+
+def test_dice_loss_class_weight_update_interval() -> None:
+    """
+    Test that class weights are only recomputed every class_weight_update_interval training minibatches, and that
+    they are always computed from the target in evaluation mode.
+    """
+    loss_fn = SoftDiceLoss(apply_softmax=False, class_weight_power=1.0, class_weight_update_interval=2,
+                           class_weight_momentum=0.5)
+    target1, target2 = valid_random_targets[1], valid_random_targets[2]
+    weights1 = get_class_weights(target1, class_weight_power=1.0)
+    weights2 = get_class_weights(target2, class_weight_power=1.0)
+    assert torch.allclose(loss_fn.get_class_weights(target1), weights1)
+    # Second minibatch: Weights are not recomputed
+    assert torch.allclose(loss_fn.get_class_weights(target2), weights1)
+    # Third minibatch: Weights are recomputed and averaged
+    assert torch.allclose(loss_fn.get_class_weights(target2), 0.5 * weights1 + 0.5 * weights2)
+    loss_fn.eval()
+    assert torch.allclose(loss_fn.get_class_weights(target1), weights1)
+
+
+def test_dice_loss_invalid_class_weight_update_interval() -> None:
+    with pytest.raises(ValueError):
+        SoftDiceLoss(class_weight_update_interval=0)
+
+
+def test_dice_stats_low_precision() -> None:
+    """
+    Test that the per-class sums are returned in float32 when the inputs are in lower precision.
+    """
+    output, target = valid_random_outputs[2], valid_random_targets[2]
+    axes = list(range(2, len(output.shape)))
+    stats = _dice_stats(output.bfloat16(), target.bfloat16(), axes, 0.0, False)
+    expected = _dice_stats(output, target, axes, 0.0, False)
+    for actual, expected_stat in zip(stats, expected):
+        assert actual.dtype == torch.float32
+        assert torch.allclose(actual, expected_stat, rtol=1e-2)
+
+
+def test_dice_loss_with_softmax() -> None:
+    """
+    Test that applying the softmax inside the loss gives the same result as applying it beforehand.
+    """
+    logits = torch.rand(batch_size, classes, 3, 4) * 10
+    target = valid_random_targets[1]
+    loss_with_softmax = SoftDiceLoss(eps=0, apply_softmax=True)(logits, target)
+    loss_without_softmax = dice_loss_f(torch.nn.functional.softmax(logits, dim=1), target)
+    assert torch.allclose(loss_with_softmax, loss_without_softmax)
@@ -17,7 +17,7 @@ from InnerEye.Common.type_annotations import TupleFloat3
 from InnerEye.ML import metrics
 from InnerEye.ML.configs.classification.DummyClassification import DummyClassification
 from InnerEye.ML.configs.regression.DummyRegression import DummyRegression
-from InnerEye.ML.lightning_metrics import AverageWithoutNan, MetricForMultipleStructures, ScalarMetricsBase
+from InnerEye.ML.lightning_metrics import AverageWithoutNan, MetricForMultipleStructures, ScalarMetricsBase, nanmean
 from InnerEye.ML.metrics_dict import MetricsDict, get_column_name_for_logging
 
 
@@ -254,6 +254,14 @@ def test_average_without_nan() -> None:
         assert "No values stored" in str(ex)
 
 
+def test_nanmean() -> None:
+    """
+    Tests the function that averages a tensor while skipping NaN values.
+    """
+    assert nanmean(torch.tensor([1.0, 2.0, math.nan])).item() == 1.5
+    assert torch.isnan(nanmean(torch.tensor([math.nan, math.nan])))
+
+
 def test_dice_for_multiple_structures() -> None:
     """
     Test the class that stores per-structure Dice values and their across-structure mean.
@@ -17,7 +17,7 @@ from InnerEye.Common.output_directories import OutputFolderForTests
 from InnerEye.ML.common import LAST_CHECKPOINT_FILE_NAME_WITH_SUFFIX, FINAL_ENSEMBLE_MODEL_FOLDER, FINAL_MODEL_FOLDER
 from InnerEye.ML.model_config_base import ModelConfigBase
 from InnerEye.ML.model_inference_config import read_model_inference_config
-from InnerEye.ML.utils.checkpoint_handling import CheckpointHandler
+from InnerEye.ML.utils.checkpoint_handling import AsyncCheckpointIO, CheckpointHandler
 from Tests.AfterTraining.test_after_training import FALLBACK_ENSEMBLE_RUN, FALLBACK_SINGLE_RUN, get_most_recent_run, \
     get_most_recent_run_id, get_most_recent_model_id
 from Tests.ML.util import get_default_checkpoint_handler, get_default_workspace
@@ -401,3 +401,22 @@ def test_get_local_weights_path_or_download(test_output_dirs: OutputFolderForTes
     downloaded_weights_new = checkpoint_handler.get_local_checkpoints_path_or_download()
     assert len(downloaded_weights_new) == 1
     assert downloaded_weights_new[0].stat().st_mtime == modified_time
+
+
+def test_async_checkpoint_io(test_output_dirs: OutputFolderForTests) -> None:
+    """
+    Test that the asynchronous checkpoint plugin writes the state at the time of saving, and that it can remove
+    checkpoint files.
+    """
+    checkpoint_io = AsyncCheckpointIO()
+    file = test_output_dirs.root_dir / "checkpoint.ckpt"
+    weights = torch.ones((2, 2))
+    checkpoint_io.save_checkpoint({'state_dict': {'foo': weights}}, file)
+    # Modifying the weights after saving should not change what is written to disk
+    weights.add_(1.0)
+    checkpoint_io.wait()
+    loaded = torch.load(str(file))
+    assert torch.equal(loaded['state_dict']['foo'], torch.ones((2, 2)))
+    checkpoint_io.remove_checkpoint(file)
+    checkpoint_io.wait()
+    assert not file.exists()
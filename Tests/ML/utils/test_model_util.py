@@ -151,3 +151,15 @@ def test_keep_best_checkpoint(test_output_dirs: OutputFolderForTests) -> None:
     assert expected.is_file()
     # The autosave checkpoint should be deleted after training, only the single best checkpoint should remain
     assert len(list(folder.glob("*"))) == 1
+
+
+def test_create_segmentation_model_channels_last() -> None:
+    """
+    Test that the weights of a segmentation model are converted to channels-last format if requested.
+    """
+    config = DummyModel()
+    config.use_channels_last = True
+    model = create_lightning_model(config)
+    conv_weights = [p for p in model.model.parameters() if p.dim() == 5]
+    assert len(conv_weights) > 0
+    assert all(p.is_contiguous(memory_format=torch.channels_last_3d) for p in conv_weights)